@@ -1,7 +1,7 @@
 import customtkinter as ctk
 import asyncio
 import threading
-from main import HLSDownloader
+from main import HLSDownloader, install_io_executor, _gather_or_cancel
 from pathlib import Path
 from tkinter import filedialog
 from os.path import expanduser
@@ -20,9 +20,19 @@ class HLSDownloaderGUI(ctk.CTk):
         self.url_var = ctk.StringVar()
         self.output_dir_var = ctk.StringVar(value=str(Path.home() / "Videos"))  # Default to user's Videos directory
         self.status_var = ctk.StringVar(value="Ready")
+        self.output_dir_var.trace_add("write", self._on_output_dir_change)
+        self._on_output_dir_change()
         self.available_tracks = None
         self.downloader = None
 
+        # One background event loop serves every action, so the downloader's
+        # HTTP client and connection pool survive from loading to downloading
+        self._loop = asyncio.new_event_loop()
+        install_io_executor(self._loop)
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
         self.create_widgets()
 
     def create_widgets(self):
@@ -105,38 +115,58 @@ class HLSDownloaderGUI(ctk.CTk):
         if dir_path:
             self.output_dir_var.set(str(Path(dir_path).resolve()))
 
+    def _on_output_dir_change(self, *args):
+        # Resolve once per edit instead of on every action, reporting bad
+        # paths here rather than from inside a background task
+        try:
+            self._resolved_output_dir = Path(expanduser(self.output_dir_var.get())).resolve()
+        except (OSError, RuntimeError) as e:
+            self._resolved_output_dir = None
+            self.status_var.set(f"Invalid output directory: {str(e)}")
+
+    def on_close(self):
+        try:
+            if self.downloader:
+                asyncio.run_coroutine_threadsafe(self.downloader.aclose(), self._loop).result(timeout=5)
+        except Exception:
+            # A client that will not close cleanly must not keep the window open
+            pass
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self.destroy()
+
     def load_tracks(self):
+        if self._resolved_output_dir is None:
+            self.status_var.set("Please choose a valid output directory")
+            return
+
         self.status_var.set("Loading tracks...")
-        threading.Thread(target=self._async_load_tracks, daemon=True).start()
-
-    def _async_load_tracks(self):
-        async def load():
-            try:
-                self.downloader = HLSDownloader(
-                    self.url_var.get(), 
-                    str(Path(expanduser(self.output_dir_var.get())).resolve())
-                )
-                await self.downloader.initialize()
-                self.available_tracks = self.downloader.get_available_tracks()
-                
-                # Update UI in main thread
-                self.after(0, self._update_track_menus)
-                self.status_var.set("Tracks loaded successfully")
-            except Exception as e:
-                # Fix: Create a lambda with explicit parameter
-                self.after(0, lambda err=e: self.status_var.set(f"Error: {str(err)}"))
-
-        asyncio.run(load())
+        asyncio.run_coroutine_threadsafe(self._load_tracks(), self._loop)
+
+    async def _load_tracks(self):
+        try:
+            if self.downloader:
+                await self.downloader.aclose()
+            self.downloader = HLSDownloader(self.url_var.get(), str(self._resolved_output_dir))
+            await self.downloader.initialize()
+            self.available_tracks = self.downloader.get_available_tracks()
+            
+            # Update UI in main thread
+            self.after(0, self._update_track_menus)
+            self.status_var.set("Tracks loaded successfully")
+        except Exception as e:
+            # Fix: Create a lambda with explicit parameter
+            self.after(0, lambda err=e: self.status_var.set(f"Error: {str(err)}"))
 
     def _update_track_menus(self):
         # Update video tracks
-        video_resolutions = list(self.available_tracks["video_tracks"].keys())
+        video_resolutions = list(self.available_tracks["video"])
         self.video_menu.configure(state="normal", values=video_resolutions)
         if video_resolutions:
             self.video_var.set(video_resolutions[0])
 
         # Update audio tracks
-        audio_languages = ["None"] + list(self.available_tracks["audio_tracks"].keys())
+        audio_languages = ["None"] + list(self.available_tracks["audio"])
         self.audio_menu.configure(state="normal", values=audio_languages)
         self.audio_var.set(audio_languages[0])
 
@@ -144,61 +174,47 @@ class HLSDownloaderGUI(ctk.CTk):
         if not self.downloader or not self.available_tracks:
             self.status_var.set("Please load tracks first")
             return
+        if self._resolved_output_dir is None:
+            self.status_var.set("Please choose a valid output directory")
+            return
 
-        threading.Thread(target=self._async_download, daemon=True).start()
-
-    def _async_download(self):
-        async def download():
-            try:
-                output_dir = str(Path(expanduser(self.output_dir_var.get())).resolve())
-                self.downloader.output_dir = Path(output_dir)
-                
-                self.status_var.set("Downloading video...")
-                self.progress_bar.set(0)
-
-                video_path, video_initial_time = await self.downloader.download_partial_stream(
-                    self.downloader.video_tracks[self.video_var.get()].url,
-                    float(self.start_time.get()),
-                    float(self.end_time.get()),
-                    "partial_video.ts"
-                )
-
-                audio_path = None
-                if self.audio_var.get() != "None":
-                    self.status_var.set("Downloading audio...")
-                    audio_path, _ = await self.downloader.download_partial_stream(
-                        self.downloader.audio_tracks[self.audio_var.get()].url,
-                        float(self.start_time.get()),
-                        float(self.end_time.get()),
-                        "partial_audio.ts"
-                    )
-
-                subtitle_path = None
-                if self.subtitle_url.get():
-                    self.status_var.set("Processing subtitles...")
-                    subtitle_path = await self.downloader.process_subtitles(
-                        self.subtitle_url.get(),
-                        video_initial_time,
-                        float(self.start_time.get()),
-                        float(self.end_time.get())
-                    )
-
-                self.status_var.set("Merging streams...")
-                output_path = str(Path(output_dir) / "output_partial.mkv")
-                await self.downloader.merge_streams(video_path, audio_path, output_path)
-
-                # Cleanup
-                temp_files = [f for f in [video_path, audio_path] if f]
-                self.downloader.cleanup(temp_files)
-
-                self.status_var.set("Download complete!")
-                self.progress_bar.set(1)
-
-            except Exception as e:
-                # Fix: Create a lambda with explicit parameter
-                self.after(0, lambda err=e: self.status_var.set(f"Error: {str(err)}"))
-
-        asyncio.run(download())
+        asyncio.run_coroutine_threadsafe(self._download(), self._loop)
+
+    async def _download(self):
+        try:
+            output_dir = self._resolved_output_dir
+            self.downloader.output_dir = output_dir
+            
+            self.status_var.set("Downloading...")
+            self.progress_bar.set(0)
+
+            start_time = float(self.start_time.get())
+            end_time = float(self.end_time.get())
+            video_url = self.downloader.video_tracks[self.video_var.get()].url
+            subtitle_url = self.subtitle_url.get()
+
+            output_path = str(output_dir / "output_partial.mkv")
+            audio_url = None
+            if self.audio_var.get() != "None":
+                audio_url = self.downloader.audio_tracks[self.audio_var.get()].url
+
+            downloads = [self.downloader.download_clip(
+                video_url, audio_url, start_time, end_time, output_path
+            )]
+            if subtitle_url:
+                downloads.append(self.downloader.process_subtitles(
+                    subtitle_url, video_url, start_time, end_time
+                ))
+            # If either fails the other is cancelled, so a failed subtitle
+            # fetch cannot leave FFmpeg writing the clip in the background
+            await _gather_or_cancel(*downloads)
+
+            self.status_var.set("Download complete!")
+            self.progress_bar.set(1)
+
+        except Exception as e:
+            # Fix: Create a lambda with explicit parameter
+            self.after(0, lambda err=e: self.status_var.set(f"Error: {str(err)}"))
 
 def main():
     app = HLSDownloaderGUI()
@@ -1,30 +1,380 @@
 import m3u8
-import requests
 import os
+import stat
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple, List
-from urllib.parse import urljoin
-from webvtt import WebVTT, Caption
+from typing import BinaryIO, Dict, Optional, Tuple, List, Union
+from types import MappingProxyType
+from urllib.parse import urljoin, urlsplit, urlunsplit
 from pathlib import Path
 import asyncio
-import aiohttp
+import hashlib
+import json
+import multiprocessing
+import random
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import httpx
 import questionary
 from os.path import expanduser
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# uvloop is a faster drop-in event loop; every loop created from here on,
+# including the GUI's background loop, uses it when it is available
+if uvloop is not None and os.name != 'nt':
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+# Matches a WebVTT cue from its timing line (hours being optional) up to
+# the blank line that ends it, capturing the start, end and cue text
+_CUE_RE = re.compile(
+    r'^((?:\d+:)?\d{2}:\d{2}\.\d{3})[ \t]+-->[ \t]+((?:\d+:)?\d{2}:\d{2}\.\d{3})'
+    r'[^\n]*((?:\n[ \t]*\S[^\n]*)*)',
+    re.MULTILINE
+)
+
+# Matches the media playlist lines segment selection needs: EXTINF
+# durations, EXT-X-BYTERANGE tags and segment URIs
+_MEDIA_LINE_RE = re.compile(
+    r'^(?:#EXTINF:[ \t]*([\d.]+)[^\n]*|#EXT-X-BYTERANGE:[ \t]*(\d+(?:@\d+)?)[^\n]*'
+    r'|([^#\s][^\n]*?))[ \t\r]*$',
+    re.MULTILINE
+)
+
+# Worker threads for blocking file I/O run off the event loop
+IO_THREADS = int(os.environ.get('HLS_IO_THREADS', '8'))
+
+def install_io_executor(loop: asyncio.AbstractEventLoop):
+    """Give the event loop a default executor sized for file I/O."""
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=IO_THREADS))
+
+# Let FFmpeg fetch clips straight from the playlists instead of downloading
+# segments in Python; the Python path stays the default
+FFMPEG_FETCH = os.environ.get('HLS_FFMPEG_FETCH') == '1'
+
+# Minimum number of seconds between progress line repaints
+PROGRESS_INTERVAL = 0.1
+
+# Seconds a fetched playlist is reused before it is downloaded again
+PLAYLIST_CACHE_TTL = 300
+
+# Directory under the output directory holding playlists served with an
+# ETag, revalidated with a conditional GET on later runs. Opt in with
+# HLS_PLAYLIST_CACHE=1: entries are never evicted, and token-bearing
+# playlist URLs are rarely requested twice
+PLAYLIST_DISK_CACHE = ".m3u8cache"
+PLAYLIST_CACHE = os.environ.get('HLS_PLAYLIST_CACHE') == '1'
+
+# Directory under the output directory keeping downloaded segments, so a
+# re-run with nearby start/end times only fetches the segments it lacks.
+# Opt in with HLS_SEGMENT_CACHE=1: entries are never evicted and every
+# segment is written to disk a second time
+SEGMENT_DISK_CACHE = ".segcache"
+SEGMENT_CACHE = os.environ.get('HLS_SEGMENT_CACHE') == '1'
+
+# Segments larger than this are split into parallel byte-range requests;
+# long-RTT links may want bigger chunks, throttled CDNs smaller ones
+MIN_RANGE_CHUNK_SIZE = 64 << 10
+
+def _range_chunk_size() -> int:
+    """Read HLS_RANGE_CHUNK_SIZE, rejecting values that cannot work."""
+    value = os.environ.get('HLS_RANGE_CHUNK_SIZE') or str(2 << 20)
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError(
+            f"HLS_RANGE_CHUNK_SIZE must be a whole number of bytes, got {value!r}"
+        ) from None
+    if size < MIN_RANGE_CHUNK_SIZE:
+        raise ValueError(
+            f"HLS_RANGE_CHUNK_SIZE must be at least {MIN_RANGE_CHUNK_SIZE} bytes, got {size}"
+        )
+    return size
+
+RANGE_CHUNK_SIZE = _range_chunk_size()
+
+# Most buffers a single writev() call accepts
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = -1
+if IOV_MAX <= 0:
+    IOV_MAX = 1024
+
+def _preallocate(out: BinaryIO, size: int):
+    """Reserve size bytes for a regular output file so it is laid out contiguously."""
+    if not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        fd = out.fileno()
+        if stat.S_ISREG(os.fstat(fd).st_mode):
+            os.posix_fallocate(fd, 0, size)
+    except OSError:
+        # Only a layout hint; some file systems do not support it
+        pass
+
+def _write_buffers(out: BinaryIO, buffers: List[bytes]):
+    """Write buffers to out in order, with one writev() per IOV_MAX buffers where supported."""
+    try:
+        fd = out.fileno()
+    except OSError:
+        fd = None
+    if fd is None or not hasattr(os, 'writev'):
+        out.writelines(buffers)
+        return
+
+    out.flush()
+    for offset in range(0, len(buffers), IOV_MAX):
+        chunk = buffers[offset:offset + IOV_MAX]
+        done = 0
+        while done < len(chunk):
+            written = os.writev(fd, chunk[done:])
+            # Skip what was written, trimming a buffer that was cut short
+            while done < len(chunk) and written >= len(chunk[done]):
+                written -= len(chunk[done])
+                done += 1
+            if written:
+                chunk[done] = memoryview(chunk[done])[written:]
+
+async def _gather_or_cancel(*aws):
+    """Like asyncio.gather, but cancel the remaining awaitables once one fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+# Throttling and overload responses that are worth retrying, with
+# exponential backoff starting at RETRY_BACKOFF seconds
+RETRY_STATUSES = (429, 503)
+# Transport failures that a later attempt can get past; the rest, such as
+# an unsupported scheme or a misconfigured proxy, fail the same way again
+RETRY_ERRORS = (httpx.NetworkError, httpx.TimeoutException, httpx.RemoteProtocolError)
+MAX_RETRIES = 4
+RETRY_BACKOFF = 0.5
+RETRY_MAX_DELAY = 30
+
+# A segment's URI as written in its playlist and, for EXT-X-BYTERANGE
+# segments, the inclusive (first, last) byte range it occupies there
+SegmentRequest = Tuple[str, Optional[Tuple[int, int]]]
+
+# Smallest number of completed fetches per throughput sample (samples also
+# cover at least two full rounds at the current limit), and the share of a
+# step's proportional change in limit that throughput has to follow for
+# the link to count as not saturated
+ADAPT_WINDOW = 16
+ADAPT_EFFICIENCY = 0.5
+
+class _AdaptiveLimiter:
+    """Concurrency limit that hill-climbs on aggregate download throughput.
+
+    After measuring bytes per second at the current limit, it steps the
+    limit by about a quarter and measures again. A step up is kept if
+    throughput grew with it, as it does while fetches wait on latency
+    rather than bandwidth; a step down is kept if throughput barely fell.
+    The initial limit is the floor until a step up gains too little, which
+    shows the link is saturated; only then does it probe below it.
+    """
+
+    def __init__(self, limit: int, minimum: int, maximum: int):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(limit, maximum))
+        self.floor = self.limit
+        self._semaphore = asyncio.Semaphore(self.limit)
+        # Slots to swallow on release after the limit was lowered
+        self._excess = 0
+        # Completions to skip while fetches started under a previous limit
+        # finish; the bunched-up first rounds would overstate throughput
+        self._settling = 2 * self.limit
+        self._sample_start: Optional[float] = None
+        self._sample_bytes = 0
+        self._sample_count = 0
+        self._direction = 1
+        # Limit and throughput from before the step being evaluated
+        self._probe: Optional[Tuple[int, float]] = None
+
+    async def acquire(self):
+        await self._semaphore.acquire()
+
+    def slot(self) -> '_LimiterSlot':
+        """Hold one slot for a single request; set received on the slot once it succeeds."""
+        return _LimiterSlot(self)
+
+    def release(self, received: Optional[int] = None):
+        """Free a slot, feeding in how many bytes a successful fetch returned."""
+        if received is not None:
+            self._record(received)
+        if self._excess:
+            self._excess -= 1
+        else:
+            self._semaphore.release()
+
+    def _record(self, received: int):
+        if self._settling:
+            self._settling -= 1
+            return
+        now = asyncio.get_running_loop().time()
+        if self._sample_start is None:
+            # The first completion only marks where the sample starts
+            self._sample_start = now
+            return
+        self._sample_bytes += received
+        self._sample_count += 1
+        if self._sample_count < max(ADAPT_WINDOW, 2 * self.limit):
+            return
+
+        elapsed = now - self._sample_start
+        rate = self._sample_bytes / elapsed if elapsed > 0 else float('inf')
+        self._sample_start = None
+        self._sample_bytes = self._sample_count = 0
+        self._evaluate(rate)
+
+    def _evaluate(self, rate: float):
+        if self._probe is not None:
+            previous_limit, previous_rate = self._probe
+            self._probe = None
+            # Throughput following the limit one for one would give this rate
+            scaled_rate = previous_rate * self.limit / previous_limit
+            expected = previous_rate + ADAPT_EFFICIENCY * (scaled_rate - previous_rate)
+            if rate >= expected:
+                return
+            if self.limit > previous_limit:
+                # More requests gained too little: the link is saturated
+                self.floor = self.minimum
+                self._direction = -1
+            else:
+                self._direction = 1
+            self._set_limit(previous_limit)
+            return
+
+        # rate is a baseline for the current limit; probe from it
+        step = max(1, self.limit // 4)
+        if self._direction > 0:
+            target = min(self.limit + step, self.maximum)
+        else:
+            target = max(self.limit - step, self.floor)
+            if target == self.limit:
+                self._direction = 1
+        if target != self.limit:
+            self._probe = (self.limit, rate)
+            self._set_limit(target)
+
+    def _set_limit(self, limit: int):
+        change = limit - self.limit
+        self.limit = limit
+        if change < 0:
+            self._excess -= change
+        else:
+            absorbed = min(change, self._excess)
+            self._excess -= absorbed
+            for _ in range(change - absorbed):
+                self._semaphore.release()
+        self._settling = limit
+        self._sample_start = None
+        self._sample_bytes = self._sample_count = 0
+
+class _LimiterSlot:
+    """Async context manager holding one _AdaptiveLimiter slot."""
+
+    def __init__(self, limiter: _AdaptiveLimiter):
+        self.limiter = limiter
+        self.received: Optional[int] = None
+
+    async def __aenter__(self) -> '_LimiterSlot':
+        await self.limiter.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.limiter.release(self.received)
+
+# Playlists at least this large are parsed in a worker process so the
+# CPU-bound parse does not hold up segment downloads on the event loop
+PARSE_IN_PROCESS_THRESHOLD = 1 << 20
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def _parse_playlist(text: str, uri: str) -> Union[m3u8.M3U8, 'MediaPlaylist']:
+    """Parse playlist text; module level so worker processes can run it.
+
+    Media playlists only need each segment's duration, URI and byte range,
+    so they skip the m3u8 object model; master playlists still use it.
+    """
+    if '#EXT-X-STREAM-INF' in text:
+        return m3u8.loads(text, uri=uri)
+
+    segments = []
+    duration = 0.0
+    byterange = None
+    for match in _MEDIA_LINE_RE.finditer(text):
+        extinf, range_tag, segment_uri = match.groups()
+        if extinf is not None:
+            duration = float(extinf)
+        elif range_tag is not None:
+            byterange = range_tag
+        else:
+            segments.append(MediaSegment(segment_uri, duration, byterange))
+            duration = 0.0
+            byterange = None
+    return MediaPlaylist(segments)
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Return the shared playlist parsing pool, starting it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        # Forking a process that already runs the GUI, event loop and I/O
+        # threads can deadlock the child, so always start clean interpreters
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _parse_pool
 
 @dataclass
 class VideoTrack:
     resolution: str
     bandwidth: int
-    url: str
+    uri: str
+    base_url: str
+
+    @property
+    def url(self) -> str:
+        return urljoin(self.base_url, self.uri)
+
+@dataclass
+class MediaSegment:
+    uri: str
+    duration: float
+    byterange: Optional[str] = None
+
+@dataclass
+class MediaPlaylist:
+    segments: List[MediaSegment]
 
 @dataclass
 class AudioTrack:
     language: str
     name: str
-    url: str
+    uri: str
+    base_url: str
+
+    @property
+    def url(self) -> str:
+        return urljoin(self.base_url, self.uri)
 
 class HLSDownloader:
-    def __init__(self, master_playlist_url: str, output_dir: str = "downloads"):
+    def __init__(
+        self,
+        master_playlist_url: str,
+        output_dir: str = "downloads",
+        concurrency: int = 16,
+        max_concurrency: int = 32
+    ):
         self.master_playlist_url = master_playlist_url
         self.output_dir = Path(expanduser(output_dir)).resolve()
         self.base_url = master_playlist_url.rsplit('/', 1)[0] + '/'
@@ -34,19 +384,290 @@ class HLSDownloader:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': '*/*',
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Segment fetches start at concurrency and adapt up to max_concurrency
+        self.concurrency = concurrency
+        self.max_concurrency = max(concurrency, max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._playlist_cache: Dict[str, Tuple[float, Union[m3u8.M3U8, MediaPlaylist]]] = {}
+        self._timeline_cache: Dict[str, List[float]] = {}
+        self._segment_request_cache: Dict[str, List[SegmentRequest]] = {}
+        self._playlist_loads: Dict[str, asyncio.Future] = {}
+        self._prefetch_tasks = set()
+        # Streams downloading at once share one progress line
+        self._progress: Dict[str, Tuple[int, int]] = {}
+        self._progress_running = set()
+        self._progress_painted = 0.0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use.
+
+        HTTP/2 lets concurrent segment requests to one CDN host multiplex
+        over a single connection; HTTP/1.1-only servers get a pool instead.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=self.headers,
+                follow_redirects=True,
+                # The segment limiters bound how many requests queue for a
+                # connection, so waiting for one is not timed out
+                timeout=httpx.Timeout(30, pool=None),
+                # Keep idle connections around between the playlist, subtitle
+                # and segment phases so none of them pays for a new handshake;
+                # video and audio each run up to max_concurrency requests
+                limits=httpx.Limits(
+                    max_connections=2 * self.max_concurrency,
+                    max_keepalive_connections=2 * self.max_concurrency,
+                    keepalive_expiry=75
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        for task in (*self._prefetch_tasks, *self._playlist_loads.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> 'HLSDownloader':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
     async def initialize(self):
         """Initialize by parsing the master playlist."""
         try:
-            self.output_dir.mkdir(exist_ok=True)
-            response = self.session.get(self.master_playlist_url)
-            master_playlist = m3u8.loads(response.text)
+            # Create the output directory off the event loop while the
+            # master playlist is in flight
+            _, master_playlist = await asyncio.gather(
+                asyncio.get_running_loop().run_in_executor(
+                    None, lambda: self.output_dir.mkdir(exist_ok=True)
+                ),
+                self._load_playlist(self.master_playlist_url)
+            )
             self._parse_master_playlist(master_playlist)
+            self._prefetch_track_playlists()
         except Exception as e:
             raise
 
+    async def _fetch_text(self, url: str) -> str:
+        """Fetch a text resource over the shared client."""
+        response = await self._get_client().get(url)
+        response.raise_for_status()
+        return response.text
+
+    async def _fetch_playlist_text(self, url: str) -> str:
+        """Fetch a playlist's text, revalidating an on-disk copy by its ETag."""
+        if not PLAYLIST_CACHE:
+            return await self._fetch_text(url)
+        loop = asyncio.get_running_loop()
+        cache_path = (self.output_dir / PLAYLIST_DISK_CACHE
+                      / hashlib.blake2b(url.encode(), digest_size=16).hexdigest())
+        cached = await loop.run_in_executor(None, self._read_cached_playlist, cache_path)
+
+        headers = {'If-None-Match': cached['etag']} if cached else None
+        response = await self._get_client().get(url, headers=headers)
+        if cached and response.status_code == 304:
+            return cached['text']
+        response.raise_for_status()
+
+        text = response.text
+        etag = response.headers.get('ETag')
+        if etag:
+            await loop.run_in_executor(
+                None, self._write_cached_playlist, cache_path, etag, text
+            )
+        return text
+
+    @staticmethod
+    def _read_cached_playlist(cache_path: Path) -> Optional[dict]:
+        """Return the cached ETag and text of a playlist, if there is a valid copy."""
+        try:
+            cached = json.loads(cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(cached, dict) or not isinstance(cached.get('etag'), str)
+                or not isinstance(cached.get('text'), str)):
+            return None
+        return cached
+
+    @staticmethod
+    def _write_cached_playlist(cache_path: Path, etag: str, text: str):
+        """Store a playlist's text with the ETag it was served with."""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({'etag': etag, 'text': text}), encoding='utf-8')
+        except OSError:
+            # The disk cache only saves a transfer; a failed write is harmless
+            pass
+
+    def _segment_cache_path(self, url: str, byte_range: Optional[Tuple[int, int]]) -> Path:
+        """Return where a playlist segment is kept on disk.
+
+        EXT-X-BYTERANGE segments are keyed by their own range rather than
+        a coalesced request's, so entries do not depend on where a clip starts.
+        """
+        key = url if byte_range is None else f"{url}#{byte_range[0]}-{byte_range[1]}"
+        return (self.output_dir / SEGMENT_DISK_CACHE
+                / hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+    @staticmethod
+    def _read_cached_segment(cache_path: Path, byte_range: Optional[Tuple[int, int]]) -> Optional[bytes]:
+        """Return a cached segment's bytes, if there is a complete copy."""
+        try:
+            content = cache_path.read_bytes()
+        except OSError:
+            return None
+        if byte_range is not None and len(content) != byte_range[1] - byte_range[0] + 1:
+            return None
+        return content
+
+    @staticmethod
+    def _write_cached_segments(entries: List[Tuple[Path, bytes]]):
+        """Store downloaded segments, replacing each entry only once it is complete."""
+        try:
+            for cache_path, content in entries:
+                partial_path = cache_path.with_suffix('.part')
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                partial_path.write_bytes(content)
+                os.replace(partial_path, cache_path)
+        except OSError:
+            # Like the playlist cache, a failed write only costs a later transfer
+            pass
+
+    async def _load_playlist(self, url: str) -> Union[m3u8.M3U8, MediaPlaylist]:
+        """Fetch and parse a playlist, reusing the result for repeated URLs.
+
+        Cached copies expire after PLAYLIST_CACHE_TTL seconds so a GUI
+        session left open does not keep serving a stale playlist.
+        """
+        cached = self._playlist_cache.get(url)
+        if cached is not None and cached[0] > asyncio.get_running_loop().time():
+            return cached[1]
+
+        return await asyncio.shield(self._start_playlist_load(url))
+
+    def _start_playlist_load(self, url: str) -> asyncio.Future:
+        """Return the in-flight fetch of a playlist, starting one if needed.
+
+        Concurrent callers, such as the clip download and the subtitle
+        offset lookup, share one fetch of the same playlist.
+        """
+        load = self._playlist_loads.get(url)
+        if load is None:
+            load = asyncio.ensure_future(self._fetch_playlist(url))
+            self._playlist_loads[url] = load
+            load.add_done_callback(lambda _: self._playlist_loads.pop(url, None))
+        return load
+
+    def _prefetch_track_playlists(self):
+        """Start fetching every track's playlist while the user is choosing."""
+        warmed_hosts = set()
+        for track in (*self.video_tracks.values(), *self.audio_tracks.values()):
+            task = asyncio.ensure_future(self._prefetch_track(track.url, warmed_hosts))
+            self._prefetch_tasks.add(task)
+            task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _prefetch_track(self, url: str, warmed_hosts: set):
+        """Fetch a track playlist and open a connection to its segment host."""
+        try:
+            playlist = await self._load_playlist(url)
+            requests = self._segment_requests(url, playlist)
+            if not requests:
+                return
+            first_url = self._resolve_uri(url, self._segment_base(url), requests[0][0])
+            host = httpx.URL(first_url).host
+            if host in warmed_hosts:
+                return
+            warmed_hosts.add(host)
+            # Whatever the response, it leaves a pooled connection with the
+            # TLS handshake done for the first real segment request to reuse
+            await self._get_client().head(first_url)
+        except Exception:
+            # A failed prefetch is retried, and reported, on real use
+            pass
+
+    async def _fetch_playlist(self, url: str) -> Union[m3u8.M3U8, MediaPlaylist]:
+        """Fetch and parse a playlist into the cache."""
+        loop = asyncio.get_running_loop()
+        text = await self._fetch_playlist_text(url)
+        if len(text) < PARSE_IN_PROCESS_THRESHOLD:
+            playlist = _parse_playlist(text, url)
+        else:
+            playlist = await loop.run_in_executor(
+                _get_parse_pool(), _parse_playlist, text, url
+            )
+        self._playlist_cache[url] = (loop.time() + PLAYLIST_CACHE_TTL, playlist)
+        self._timeline_cache.pop(url, None)
+        self._segment_request_cache.pop(url, None)
+        return playlist
+
+    def _segment_timeline(self, playlist_url: str, playlist: MediaPlaylist) -> List[float]:
+        """Return each segment's start time followed by the total duration."""
+        timeline = self._timeline_cache.get(playlist_url)
+        if timeline is None:
+            timeline = list(accumulate(
+                (segment.duration for segment in playlist.segments),
+                initial=0.0
+            ))
+            self._timeline_cache[playlist_url] = timeline
+        return timeline
+
+    def _segment_requests(self, playlist_url: str, playlist: MediaPlaylist) -> List[SegmentRequest]:
+        """Return every segment's URI and byte range, worked out once per playlist.
+
+        URIs stay relative; they are only resolved for the segments that
+        actually get fetched.
+        """
+        requests = self._segment_request_cache.get(playlist_url)
+        if requests is None:
+            requests = []
+            # A byte range without an offset follows on from the previous
+            # range of the same resource
+            next_offset: Dict[str, int] = {}
+            for segment in playlist.segments:
+                uri = segment.uri
+                byte_range = None
+                if segment.byterange:
+                    length, _, offset = segment.byterange.partition('@')
+                    first_byte = int(offset) if offset else next_offset.get(uri, 0)
+                    next_offset[uri] = first_byte + int(length)
+                    byte_range = (first_byte, next_offset[uri] - 1)
+                requests.append((uri, byte_range))
+            self._segment_request_cache[playlist_url] = requests
+        return requests
+
+    @staticmethod
+    def _coalesce_byte_ranges(
+        requests: List[SegmentRequest],
+        cached: Optional[List[bool]] = None
+    ) -> List[range]:
+        """Group adjacent byte ranges of one resource so each group is one request.
+
+        Returns the groups as ranges of indices into requests. Groups are
+        capped at RANGE_CHUNK_SIZE so large clips still stream in order
+        instead of arriving as one buffer, and segments marked in cached
+        stay on their own.
+        """
+        runs: List[range] = []
+        start = 0
+        for index, (uri, byte_range) in enumerate(requests):
+            if index == 0:
+                continue
+            previous_uri, previous_range = requests[index - 1]
+            if (byte_range is None or previous_range is None or previous_uri != uri
+                    or previous_range[1] + 1 != byte_range[0]
+                    or byte_range[1] - requests[start][1][0] >= RANGE_CHUNK_SIZE
+                    or (cached and (cached[index] or cached[index - 1]))):
+                runs.append(range(start, index))
+                start = index
+        if requests:
+            runs.append(range(start, len(requests)))
+        return runs
+
     def _parse_master_playlist(self, master_playlist: m3u8.M3U8):
         """Parse the master playlist to extract video and audio tracks."""
         # Parse audio tracks
@@ -56,31 +677,234 @@ class HLSDownloader:
                     self.audio_tracks[media.language] = AudioTrack(
                         language=media.language,
                         name=media.name,
-                        url=urljoin(self.base_url, media.uri)
+                        uri=media.uri,
+                        base_url=self.base_url
                     )
 
-        # Parse video tracks
-        for playlist in master_playlist.playlists:
+        # Parse video tracks, best bandwidth first so menus list it at the
+        # top and a resolution offered twice keeps its better variant
+        for playlist in sorted(
+            master_playlist.playlists,
+            key=lambda p: p.stream_info.bandwidth or 0,
+            reverse=True
+        ):
             resolution = playlist.stream_info.resolution
             res_str = f"{resolution[0]}x{resolution[1]}"
-            self.video_tracks[res_str] = VideoTrack(
+            self.video_tracks.setdefault(res_str, VideoTrack(
                 resolution=res_str,
                 bandwidth=playlist.stream_info.bandwidth,
-                url=urljoin(self.base_url, playlist.uri)
-            )
+                uri=playlist.uri,
+                base_url=self.base_url
+            ))
 
     def get_available_tracks(self) -> dict:
-        """Return information about available tracks."""
+        """Return read-only views of the video and audio tracks."""
         return {
-            "video_tracks": {k: v.__dict__ for k, v in self.video_tracks.items()},
-            "audio_tracks": {k: v.__dict__ for k, v in self.audio_tracks.items()}
+            "video": MappingProxyType(self.video_tracks),
+            "audio": MappingProxyType(self.audio_tracks)
         }
 
-    async def _download_segment(self, session: aiohttp.ClientSession, segment_url: str) -> bytes:
-        """Download a single segment using aiohttp."""
-        async with session.get(segment_url, headers=self.headers) as response:
-            response.raise_for_status()
-            return await response.read()
+    async def _download_segment(
+        self,
+        client: httpx.AsyncClient,
+        limiter: _AdaptiveLimiter,
+        segment_url: str
+    ) -> bytes:
+        """Download a single segment.
+
+        The first request only asks for one range chunk. If the server honours
+        it and the segment is larger, the remainder is fetched as parallel
+        byte ranges; servers that ignore Range simply return the whole body.
+        Ranged segments are read straight into one buffer of the final size,
+        unless the server leaves the total out of Content-Range. Every
+        request takes its own limiter slot, range chunks included.
+        """
+        first_range = {'Range': f'bytes=0-{RANGE_CHUNK_SIZE - 1}'}
+        async with limiter.slot() as slot:
+            async with client.stream('GET', segment_url, headers=first_range) as response:
+                if response.status_code == 416:
+                    # Empty segment: the range cannot be satisfied
+                    slot.received = 0
+                    return b''
+                response.raise_for_status()
+                if response.status_code != 206:
+                    content = await response.aread()
+                    slot.received = len(content)
+                    return content
+                total = self._content_range_total(response.headers.get('Content-Range'))
+                if total is None:
+                    first_chunk = await response.aread()
+                    slot.received = len(first_chunk)
+                else:
+                    buffer = bytearray(total)
+                    view = memoryview(buffer)
+                    received = slot.received = await self._read_into(response, view)
+
+        # The first slot is free again before the remaining ranges queue for
+        # theirs, so segments waiting on more slots cannot starve each other
+        if total is None:
+            return await self._download_unsized(client, limiter, segment_url, first_chunk)
+        await _gather_or_cancel(*(
+            self._download_range(
+                client, limiter, segment_url, view[offset:offset + RANGE_CHUNK_SIZE],
+                offset, min(offset + RANGE_CHUNK_SIZE, total) - 1
+            )
+            for offset in range(received, total, RANGE_CHUNK_SIZE)
+        ))
+        return buffer
+
+    async def _download_unsized(
+        self,
+        client: httpx.AsyncClient,
+        limiter: _AdaptiveLimiter,
+        url: str,
+        first_chunk: bytes
+    ) -> bytes:
+        """Finish a segment whose server did not say how long it is.
+
+        Ranges are requested one after another until one comes back short,
+        or the server reports the range as past the end.
+        """
+        chunks = [first_chunk]
+        offset = len(first_chunk)
+        while len(chunks[-1]) >= RANGE_CHUNK_SIZE:
+            range_header = {'Range': f'bytes={offset}-{offset + RANGE_CHUNK_SIZE - 1}'}
+            async with limiter.slot() as slot:
+                async with client.stream('GET', url, headers=range_header) as response:
+                    if response.status_code == 416:
+                        slot.received = 0
+                        break
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RuntimeError(f"Server ignored range request for {url}")
+                    chunk = await response.aread()
+                    slot.received = len(chunk)
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b''.join(chunks)
+
+    async def _download_byte_range(
+        self,
+        client: httpx.AsyncClient,
+        limiter: _AdaptiveLimiter,
+        url: str,
+        first_byte: int,
+        last_byte: int
+    ) -> bytes:
+        """Download an EXT-X-BYTERANGE span, in parallel range chunks when large."""
+        buffer = bytearray(last_byte - first_byte + 1)
+        view = memoryview(buffer)
+        await _gather_or_cancel(*(
+            self._download_range(
+                client, limiter, url, view[offset:offset + RANGE_CHUNK_SIZE],
+                first_byte + offset, first_byte + min(offset + RANGE_CHUNK_SIZE, len(buffer)) - 1
+            )
+            for offset in range(0, len(buffer), RANGE_CHUNK_SIZE)
+        ))
+        return buffer
+
+    async def _download_range(
+        self,
+        client: httpx.AsyncClient,
+        limiter: _AdaptiveLimiter,
+        url: str,
+        view: memoryview,
+        first_byte: int,
+        last_byte: int
+    ):
+        """Download an inclusive byte range of a resource into view."""
+        range_header = {'Range': f'bytes={first_byte}-{last_byte}'}
+        async with limiter.slot() as slot:
+            async with client.stream('GET', url, headers=range_header) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise RuntimeError(f"Server ignored range request for {url}")
+                received = await self._read_into(response, view)
+            if received != last_byte - first_byte + 1:
+                raise RuntimeError(f"Short range response for {url}")
+            slot.received = received
+
+    @staticmethod
+    async def _read_into(response: httpx.Response, view: memoryview) -> int:
+        """Copy a response body into view, returning the number of bytes read."""
+        position = 0
+        # Without a chunk size httpx yields each network read as is, rather
+        # than copying reads together into fixed-size chunks first
+        async for chunk in response.aiter_bytes():
+            view[position:position + len(chunk)] = chunk
+            position += len(chunk)
+        return position
+
+    @staticmethod
+    def _retry_delay(error: httpx.HTTPError, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying a failed fetch, or None to give up."""
+        if attempt >= MAX_RETRIES:
+            return None
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code not in RETRY_STATUSES:
+                return None
+            retry_after = error.response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), RETRY_MAX_DELAY)
+        # Jitter keeps throttled segments from all retrying at the same moment
+        return min(RETRY_BACKOFF * 2 ** attempt, RETRY_MAX_DELAY) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _content_range_total(content_range: Optional[str]) -> Optional[int]:
+        """Return the full length from a 'bytes a-b/total' Content-Range header."""
+        if not content_range:
+            return None
+        total = content_range.rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+
+    async def _select_segments(
+        self,
+        playlist_url: str,
+        start_time: float,
+        end_time: float
+    ) -> Tuple[List[SegmentRequest], float]:
+        """Return the segment requests covering a clip and the time the first one starts."""
+        playlist = await self._load_playlist(playlist_url)
+        segment_requests = self._segment_requests(playlist_url, playlist)
+
+        # Binary search the segment start times for the requested window:
+        # the first segment ending at or after start_time through the last
+        # one starting no later than end_time (open-ended when it is 0, so
+        # 0 to 0 selects the full episode)
+        timeline = self._segment_timeline(playlist_url, playlist)
+        segment_count = len(playlist.segments)
+        first = bisect_left(timeline, start_time, 1) - 1
+        last = bisect_right(timeline, end_time, 0, segment_count) if end_time != 0 else segment_count
+        return segment_requests[first:last], timeline[first]
+
+    @staticmethod
+    def _segment_base(playlist_url: str) -> str:
+        """Return the directory of a playlist URL, without its query or fragment."""
+        scheme, netloc, path, _, _ = urlsplit(playlist_url)
+        return urlunsplit((scheme, netloc, path.rsplit('/', 1)[0] + '/', '', ''))
+
+    @staticmethod
+    def _resolve_uri(playlist_url: str, base: str, uri: str) -> str:
+        """Resolve a segment URI, skipping urljoin for plain relative paths.
+
+        base is the playlist's _segment_base; anything but an http(s) URL or
+        a bare relative path goes through urljoin against the playlist URL.
+        """
+        if uri.startswith(('http://', 'https://')):
+            return uri
+        if uri.startswith(('/', '.', '?', '#')) or ':' in uri.partition('?')[0]:
+            return urljoin(playlist_url, uri)
+        return base + uri
+
+    async def get_clip_start_time(
+        self,
+        playlist_url: str,
+        start_time: float,
+        end_time: float
+    ) -> float:
+        """Return where the downloaded clip will start, without downloading it."""
+        _, initial_total_time = await self._select_segments(playlist_url, start_time, end_time)
+        return initial_total_time
 
     async def download_partial_stream(
         self,
@@ -90,158 +914,476 @@ class HLSDownloader:
         output_name: str
     ) -> Tuple[str, float]:
         output_path = self.output_dir / output_name
-        response = self.session.get(playlist_url)
-        playlist = m3u8.loads(response.text)
-        total_time = initial_total_time = 0
-        isFirstSegment = True
-        segments_to_download = []
-
-        # Handle full episode download when both times are 0
-        if start_time == 0 and end_time == 0:
-            segments_to_download = [
-                urljoin(playlist_url.rsplit('/', 1)[0] + '/', segment.uri)
-                for segment in playlist.segments
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, output_path, 'wb')
+        try:
+            initial_total_time = await self._stream_partial_stream(
+                playlist_url, start_time, end_time, output_name, f
+            )
+        finally:
+            await loop.run_in_executor(None, f.close)
+
+        return str(output_path), initial_total_time
+
+    async def _stream_partial_stream(
+        self,
+        playlist_url: str,
+        start_time: float,
+        end_time: float,
+        label: str,
+        out: BinaryIO
+    ) -> float:
+        """Download a clip's segments into out, returning the clip start time."""
+        segment_requests, initial_total_time = await self._select_segments(
+            playlist_url, start_time, end_time
+        )
+        loop = asyncio.get_running_loop()
+
+        # Byte-range playlists give the exact output size up front
+        if segment_requests and all(byte_range for _, byte_range in segment_requests):
+            size = sum(last - first + 1 for _, (first, last) in segment_requests)
+            await loop.run_in_executor(None, _preallocate, out, size)
+
+        segment_base = self._segment_base(playlist_url)
+        cache_paths: List[Path] = []
+        cached = None
+        if SEGMENT_CACHE:
+            cache_paths = [
+                self._segment_cache_path(self._resolve_uri(playlist_url, segment_base, uri), byte_range)
+                for uri, byte_range in segment_requests
             ]
-            initial_total_time = 0
-        else:
-            # Calculate segments to download
-            for segment in playlist.segments:
-                if total_time + segment.duration < start_time:
-                    total_time += segment.duration
-                    isFirstSegment = False
-                    continue
-                if initial_total_time == 0 and isFirstSegment:
-                    initial_total_time = 0
-                elif initial_total_time == 0 and not isFirstSegment:
-                    initial_total_time = total_time
-                if total_time > end_time and end_time != 0:
-                    break
-                segments_to_download.append(
-                    urljoin(playlist_url.rsplit('/', 1)[0] + '/', segment.uri)
+            cached = await loop.run_in_executor(
+                None, lambda: [path.is_file() for path in cache_paths]
+            )
+        segments_to_download = self._coalesce_byte_ranges(segment_requests, cached)
+
+        # Download segments concurrently while a single writer task streams
+        # them out in playlist order, so disk writes overlap the fetches
+        client = self._get_client()
+        limiter = _AdaptiveLimiter(self.concurrency, 2, self.max_concurrency)
+        # Segments may run at most this far ahead of the write cursor, which
+        # caps how much a single slow segment can leave buffered in memory;
+        # a fetch is only started once its segment falls inside the window
+        reorder_window = 2 * self.max_concurrency
+        window = asyncio.Semaphore(reorder_window)
+        fetches = set()
+        ready: asyncio.Queue = asyncio.Queue()
+        total_segments = len(segments_to_download)
+        next_to_write = 0
+        completed = 0
+        self._start_progress(label, total_segments)
+
+        async def download(url: str, byte_range: Optional[Tuple[int, int]]) -> bytes:
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    if byte_range is None:
+                        return await self._download_segment(client, limiter, url)
+                    return await self._download_byte_range(client, limiter, url, *byte_range)
+                except (httpx.HTTPStatusError, *RETRY_ERRORS) as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                # Requests hold limiter slots only while in flight, so
+                # backing off here does not hold one
+                await asyncio.sleep(delay)
+
+        async def fetch(index: int, run: range):
+            nonlocal completed
+            uri, byte_range = segment_requests[run.start]
+            url = self._resolve_uri(playlist_url, segment_base, uri)
+            content = None
+            if cached and cached[run.start]:
+                content = await loop.run_in_executor(
+                    None, self._read_cached_segment, cache_paths[run.start], byte_range
                 )
-                total_time += segment.duration
-
-        # Download segments
-        async with aiohttp.ClientSession() as session:
-            segment_contents = []
-            total_segments = len(segments_to_download)
-            for i, url in enumerate(segments_to_download, 1):
-                content = await self._download_segment(session, url)
-                segment_contents.append(content)
-                print(f"\rDownloading {output_name}: {i}/{total_segments}", end="")
+            if content is None:
+                if byte_range is not None:
+                    byte_range = (byte_range[0], segment_requests[run.stop - 1][1][1])
+                content = await download(url, byte_range)
+                if cache_paths:
+                    # Split a coalesced request back into its playlist
+                    # segments, and finish writing them before content is
+                    # handed on so the reorder window still bounds memory
+                    entries = [(cache_paths[run.start], content)]
+                    if byte_range is not None:
+                        view = memoryview(content)
+                        entries = []
+                        for i in run:
+                            first, last = segment_requests[i][1]
+                            offset = first - byte_range[0]
+                            entries.append((cache_paths[i], view[offset:offset + last - first + 1]))
+                    await loop.run_in_executor(None, self._write_cached_segments, entries)
+            ready.put_nowait((index, content))
+            completed += 1
+            self._report_progress(label, completed, total_segments)
+
+        def fetch_done(task: asyncio.Task):
+            fetches.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                # Hand the failure to the writer, which ends the download
+                ready.put_nowait((None, task.exception()))
+
+        async def start_fetches():
+            for index, run in enumerate(segments_to_download):
+                await window.acquire()
+                task = asyncio.ensure_future(fetch(index, run))
+                fetches.add(task)
+                task.add_done_callback(fetch_done)
+
+        async def write_in_order():
+            nonlocal next_to_write
+            pending: Dict[int, bytes] = {}
+            while next_to_write < total_segments:
+                arrived = [await ready.get()]
+                while not ready.empty():
+                    arrived.append(ready.get_nowait())
+                for index, content in arrived:
+                    if index is None:
+                        raise content
+                    pending[index] = content
+
+                # Hand every segment that is ready to the executor in one
+                # batch instead of one thread hop and system call per segment
+                batch = []
+                while next_to_write in pending:
+                    batch.append(pending.pop(next_to_write))
+                    next_to_write += 1
+                if batch:
+                    await loop.run_in_executor(None, _write_buffers, out, batch)
+                    for _ in batch:
+                        window.release()
+
+        try:
+            await _gather_or_cancel(write_in_order(), start_fetches())
+        finally:
+            running = list(fetches)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            self._finish_progress(label)
+
+        return initial_total_time
+
+    def _start_progress(self, label: str, total: int):
+        """Add a stream to the shared progress line."""
+        self._progress[label] = (0, total)
+        self._progress_running.add(label)
+
+    def _report_progress(self, label: str, completed: int, total: int):
+        """Repaint the shared progress line, at most every PROGRESS_INTERVAL and once at the end."""
+        self._progress[label] = (completed, total)
+        now = asyncio.get_running_loop().time()
+        if completed == total or now - self._progress_painted >= PROGRESS_INTERVAL:
+            self._progress_painted = now
+            streams = " | ".join(
+                f"{name}: {done}/{count}" for name, (done, count) in self._progress.items()
+            )
+            print(f"\rDownloading {streams}", end="")
+
+    def _finish_progress(self, label: str):
+        """End the progress line once the last stream sharing it is done."""
+        self._progress_running.discard(label)
+        if not self._progress_running:
             print()
+            self._progress.clear()
 
-        # Write to file
-        with open(output_path, 'wb') as f:
-            for content in segment_contents:
-                f.write(content)
+    async def download_clip(
+        self,
+        video_url: str,
+        audio_url: Optional[str],
+        start_time: float,
+        end_time: float,
+        output_path: str
+    ) -> float:
+        """Download a clip and mux it into output_path, returning its start time.
 
-        return str(output_path), initial_total_time
+        Segments are piped straight into FFmpeg rather than written to
+        temporary .ts files first.
+        """
+        if FFMPEG_FETCH:
+            return await self._download_clip_with_ffmpeg(
+                video_url, audio_url, start_time, end_time, output_path
+            )
+
+        if audio_url and os.name != 'posix':
+            # Handing FFmpeg a second pipe relies on POSIX fd inheritance
+            return await self._download_clip_via_audio_file(
+                video_url, audio_url, start_time, end_time, output_path
+            )
+
+        return await self._download_clip_via_pipes(
+            video_url, audio_url, start_time, end_time, output_path
+        )
+
+    async def _download_clip_via_pipes(
+        self,
+        video_url: str,
+        audio_url: Optional[str],
+        start_time: float,
+        end_time: float,
+        output_path: str,
+        audio_file: Optional[str] = None
+    ) -> float:
+        """Pipe the clip's streams into FFmpeg, returning its start time.
+
+        audio_file is an already downloaded audio track to mux in from disk.
+        """
+        streams = [(video_url, "video")]
+        if audio_url:
+            streams.append((audio_url, "audio"))
+
+        read_fds, writers = [], []
+        for _ in streams:
+            read_fd, write_fd = os.pipe()
+            read_fds.append(read_fd)
+            writers.append(open(write_fd, 'wb'))
+
+        # Video arrives on stdin, audio on an inherited descriptor
+        popen_kwargs = {'stdin': read_fds[0]}
+        audio_input = audio_file
+        if audio_url:
+            audio_input = f"pipe:{read_fds[1]}"
+            popen_kwargs['pass_fds'] = (read_fds[1],)
+
+        try:
+            process = await self._start_merge('pipe:0', audio_input, output_path, **popen_kwargs)
+        except BaseException:
+            for writer in writers:
+                writer.close()
+            raise
+        finally:
+            for read_fd in read_fds:
+                os.close(read_fd)
+
+        async def feed(url: str, label: str, writer: BinaryIO) -> float:
+            # Close each pipe as soon as its stream ends so FFmpeg sees EOF
+            # there while still reading the other one
+            try:
+                return await self._stream_partial_stream(
+                    url, start_time, end_time, label, writer
+                )
+            finally:
+                await self._close_pipes([writer])
+
+        # Collect FFmpeg's output while the downloads feed it
+        merge = asyncio.ensure_future(self._wait_merge(process))
+        try:
+            results = await _gather_or_cancel(*(
+                feed(url, label, writer)
+                for (url, label), writer in zip(streams, writers)
+            ))
+        except BrokenPipeError:
+            # FFmpeg stopped reading early; its own error explains why
+            await self._close_pipes(writers)
+            await merge
+            raise
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+            await asyncio.gather(merge, return_exceptions=True)
+            raise
+        finally:
+            await self._close_pipes(writers)
+
+        await merge
+        return results[0]
+
+    async def _download_clip_with_ffmpeg(
+        self,
+        video_url: str,
+        audio_url: Optional[str],
+        start_time: float,
+        end_time: float,
+        output_path: str
+    ) -> float:
+        """Have FFmpeg fetch and mux the clip itself, returning its start time."""
+        # Seek to where the first selected segment starts so the clip, and
+        # with it the subtitle offset, matches the Python fetch path
+        initial_total_time = await self.get_clip_start_time(video_url, start_time, end_time)
+        input_args = ('-user_agent', self.headers['User-Agent'], '-ss', str(initial_total_time))
+        if end_time:
+            input_args += ('-to', str(end_time))
+
+        process = await self._start_merge(
+            video_url, audio_url, output_path, input_args=input_args
+        )
+        try:
+            await self._wait_merge(process)
+        except asyncio.CancelledError:
+            # A cancelled download must not leave FFmpeg writing the output
+            if process.returncode is None:
+                process.kill()
+            raise
+        return initial_total_time
+
+    async def _download_clip_via_audio_file(
+        self,
+        video_url: str,
+        audio_url: str,
+        start_time: float,
+        end_time: float,
+        output_path: str
+    ) -> float:
+        """Download the audio to a temporary file, then pipe the video into FFmpeg.
+
+        Only the much smaller audio track goes through the disk.
+        """
+        audio_path, _ = await self.download_partial_stream(
+            audio_url, start_time, end_time, "partial_audio.ts"
+        )
+        try:
+            return await self._download_clip_via_pipes(
+                video_url, None, start_time, end_time, output_path, audio_file=audio_path
+            )
+        finally:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.cleanup, [audio_path]
+            )
+
+    @staticmethod
+    async def _close_pipes(writers: List[BinaryIO]):
+        """Close pipe writers, signalling end of input to FFmpeg."""
+        loop = asyncio.get_running_loop()
+        for writer in writers:
+            if not writer.closed:
+                try:
+                    await loop.run_in_executor(None, writer.close)
+                except BrokenPipeError:
+                    pass
 
     async def process_subtitles(
         self,
         subtitle_url: str,
-        initial_time: float,
+        video_url: str,
         start_time: float,
         end_time: float
     ) -> str:
-        """Download and process subtitles."""
-        subtitle_path = self.output_dir / "subtitle.vtt"
+        """Download and process subtitles for a clip of video_url."""
         adjusted_subtitle_path = self.output_dir / "adjusted_subtitle.vtt"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(subtitle_url, headers=self.headers) as response:
-                subtitle_content = await response.text()
-                with open(subtitle_path, 'w', encoding='utf-8') as f:
-                    f.write(subtitle_content)
-
-        self._adjust_subtitle_timing(
-            subtitle_path,
-            adjusted_subtitle_path,
+        # The subtitle GET does not depend on the clip's start time, so run
+        # it alongside the video playlist lookup that does
+        subtitle_content, initial_time = await asyncio.gather(
+            self._fetch_text(subtitle_url),
+            self.get_clip_start_time(video_url, start_time, end_time)
+        )
+        # Parse and write off the loop so a long track doesn't stall the
+        # segment downloads running alongside it
+        loop = asyncio.get_running_loop()
+        adjusted_content = await loop.run_in_executor(
+            None,
+            self._adjust_subtitle_timing,
+            subtitle_content,
             initial_time,
             start_time,
             end_time
         )
+        await loop.run_in_executor(
+            None,
+            lambda: adjusted_subtitle_path.write_text(adjusted_content, encoding='utf-8')
+        )
 
         return str(adjusted_subtitle_path)
 
     def _adjust_subtitle_timing(
         self,
-        input_file: Path,
-        output_file: Path,
+        text: str,
         initial_time: float,
         start: float,
         end: float
-    ):
+    ) -> str:
         """Adjust subtitle timing based on clip start and end times."""
-        vtt = WebVTT().read(str(input_file))
-        adjusted_captions = []
-
-        for caption in vtt:
-            start_time = self._parse_timestamp(caption.start)
-            end_time = self._parse_timestamp(caption.end)
-
-            adjusted_start = start_time - initial_time
-            adjusted_end = end_time - initial_time
-
-            if initial_time <= start_time <= end or initial_time <= end_time <= end:
-                adjusted_start = max(0, adjusted_start)
-                adjusted_captions.append(Caption(
-                    start=self._format_timestamp(adjusted_start),
-                    end=self._format_timestamp(adjusted_end),
-                    text=caption.text
-                ))
+        text = text.lstrip('\ufeff')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+
+        # Work in integer milliseconds so comparisons and shifts are exact
+        initial_ms = round(initial_time * 1000)
+        end_ms = round(end * 1000)
+
+        # One scan over the whole file finds every cue; header, NOTE, STYLE
+        # and REGION blocks carry no timing line and are never matched
+        adjusted_cues = []
+        # Look the helpers up once instead of once per cue
+        parse, format_ts, append = self._parse_timestamp, self._format_timestamp, adjusted_cues.append
+        for cue_start, cue_end, cue_text in _CUE_RE.findall(text):
+            start_ms = parse(cue_start)
+            cue_end_ms = parse(cue_end)
+            if not (initial_ms <= start_ms <= end_ms or initial_ms <= cue_end_ms <= end_ms):
+                continue
+
+            adjusted_start = max(0, start_ms - initial_ms)
+            adjusted_end = cue_end_ms - initial_ms
+            # Cue settings after the timestamps are dropped with the timing line
+            append(
+                f"{format_ts(adjusted_start)} --> "
+                f"{format_ts(adjusted_end)}\n{cue_text.strip()}"
+            )
 
-        new_vtt = WebVTT()
-        new_vtt.captions = adjusted_captions
-        new_vtt.save(str(output_file))
+        return "WEBVTT\n\n" + "\n\n".join(adjusted_cues) + "\n"
 
     @staticmethod
-    def _parse_timestamp(timestamp: str) -> float:
-        """Convert VTT timestamp to seconds."""
-        h, m, s = timestamp.split(':')
-        s, ms = s.split('.')
-        return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
+    def _parse_timestamp(timestamp: str) -> int:
+        """Convert VTT timestamp to milliseconds."""
+        # [HH:]MM:SS.mmm is fixed width from the right, so slice rather than split
+        hours = int(timestamp[:-10]) if len(timestamp) > 9 else 0
+        return (((hours * 60 + int(timestamp[-9:-7])) * 60 + int(timestamp[-6:-4])) * 1000
+                + int(timestamp[-3:]))
 
     @staticmethod
-    def _format_timestamp(seconds: float) -> str:
-        """Convert seconds to VTT timestamp format."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{int(seconds):02d}.{int((seconds % 1) * 1000):03d}"
-
-    async def merge_streams(
+    def _format_timestamp(ms: int) -> str:
+        """Convert milliseconds to VTT timestamp format."""
+        seconds, ms = divmod(ms, 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+    async def _start_merge(
         self,
-        video_path: str,
-        audio_path: Optional[str],
-        output_path: str
-    ):
-        """Merge video and audio streams using FFmpeg."""
-        try:
-            cmd = ['ffmpeg', '-i', video_path]
-            if audio_path:
-                cmd.extend(['-i', audio_path])
-            cmd.extend(['-c', 'copy', output_path, '-y'])
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                raise RuntimeError(f"FFmpeg error: {stderr.decode()}")
-            
-        except Exception as e:
-            raise
+        video_input: str,
+        audio_input: Optional[str],
+        output_path: str,
+        input_args: Tuple[str, ...] = (),
+        **popen_kwargs
+    ) -> asyncio.subprocess.Process:
+        """Start FFmpeg muxing the given inputs into output_path.
+
+        input_args are repeated in front of each input.
+        """
+        cmd = [
+            'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+            *input_args, '-fflags', '+genpts', '-i', video_input
+        ]
+        if audio_input:
+            cmd.extend([
+                *input_args, '-fflags', '+genpts', '-i', audio_input,
+                '-map', '0:v', '-map', '1:a'
+            ])
+        # Shift the clip to start at zero, matching the retimed subtitles
+        cmd.extend(['-c', 'copy', '-avoid_negative_ts', 'make_zero', output_path, '-y'])
+
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            **popen_kwargs
+        )
+
+    @staticmethod
+    async def _wait_merge(process: asyncio.subprocess.Process):
+        """Wait for an FFmpeg merge to finish, raising on failure."""
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"FFmpeg error: {stderr.decode()}")
 
     def cleanup(self, files: List[str]):
         """Clean up temporary files."""
         for file in files:
-            if file and os.path.exists(file):
-                os.remove(file)
+            if file:
+                try:
+                    os.remove(file)
+                except FileNotFoundError:
+                    pass
 
 async def async_prompt(question_func, *args, **kwargs):
     """Wrapper to make questionary prompts async-compatible"""
@@ -271,16 +1413,16 @@ async def get_user_selections(tracks: dict) -> Tuple[str, Optional[str], float,
     resolution = await async_prompt(
         questionary.select(
             "Select video resolution:",
-            choices=list(tracks["video_tracks"].keys())
+            choices=list(tracks["video"])
         ).ask
     )
 
     language = None
-    if tracks["audio_tracks"]:
+    if tracks["audio"]:
         lang = await async_prompt(
             questionary.select(
                 "Select audio language:",
-                choices=["None"] + list(tracks["audio_tracks"].keys())
+                choices=["None"] + list(tracks["audio"])
             ).ask
         )
         language = None if lang == "None" else lang
@@ -309,51 +1451,46 @@ async def get_user_selections(tracks: dict) -> Tuple[str, Optional[str], float,
 def display_tracks(tracks: dict):
     print("\nAvailable Tracks:")
     print("\nVideo tracks:")
-    for res, track in tracks["video_tracks"].items():
-        print(f"  {res} (bandwidth: {track['bandwidth']})")
+    for res, track in tracks["video"].items():
+        print(f"  {res} (bandwidth: {track.bandwidth})")
     
     print("\nAudio tracks:")
-    for lang, track in tracks["audio_tracks"].items():
-        print(f"  {lang} ({track['name']})")
+    for lang, track in tracks["audio"].items():
+        print(f"  {lang} ({track.name})")
 
 async def main():
+    install_io_executor(asyncio.get_running_loop())
     try:
         master_url, output_dir = await get_user_input()
         
         print("Initializing downloader...")
-        downloader = HLSDownloader(master_url, output_dir)
-        await downloader.initialize()
-
-        tracks = downloader.get_available_tracks()
-        display_tracks(tracks)
+        async with HLSDownloader(master_url, output_dir) as downloader:
+            await downloader.initialize()
 
-        resolution, language, start_time, end_time, subtitle_url = await get_user_selections(tracks)
+            tracks = downloader.get_available_tracks()
+            display_tracks(tracks)
 
-        video_path, video_initial_time = await downloader.download_partial_stream(
-            downloader.video_tracks[resolution].url,
-            start_time, end_time, "partial_video.ts"
-        )
+            resolution, language, start_time, end_time, subtitle_url = await get_user_selections(tracks)
 
-        audio_path = None
-        if language:
-            audio_path, _ = await downloader.download_partial_stream(
-                downloader.audio_tracks[language].url,
-                start_time, end_time, "partial_audio.ts"
-            )
+            video_url = downloader.video_tracks[resolution].url
 
-        subtitle_path = None
-        if subtitle_url:
-            subtitle_path = await downloader.process_subtitles(
-                subtitle_url, video_initial_time, start_time, end_time
-            )
-
-        output_path = str(Path(output_dir) / "output_partial.mkv")
-        await downloader.merge_streams(video_path, audio_path, output_path)
-        downloader.cleanup([video_path, audio_path])
+            output_path = str(Path(output_dir) / "output_partial.mkv")
+            audio_url = downloader.audio_tracks[language].url if language else None
+            downloads = [downloader.download_clip(
+                video_url, audio_url, start_time, end_time, output_path
+            )]
+            if subtitle_url:
+                downloads.append(downloader.process_subtitles(
+                    subtitle_url, video_url, start_time, end_time
+                ))
+            # A failure in either one cancels the other rather than leaving
+            # the clip running while the client is closed under it
+            results = await _gather_or_cancel(*downloads)
+            subtitle_path = results[1] if subtitle_url else None
 
-        print(f"\nDownload complete! File saved as: {output_path}")
-        if subtitle_path:
-            print(f"Subtitles saved as: {subtitle_path}")
+            print(f"\nDownload complete! File saved as: {output_path}")
+            if subtitle_path:
+                print(f"Subtitles saved as: {subtitle_path}")
 
     except Exception as e:
         print(f"Error: {str(e)}")